@@ -1,4 +1,5 @@
 from scene import SceneCollection
+from stats import AOIStatistics
 import util
 import numpy as np
 import matplotlib.pyplot as plt
@@ -74,7 +75,7 @@ def visualize_band_descrimination(scene, segmentation_mask, polygon, outdir):
             image=band,
             polygon=polygon,
             crs=scene.dataset.crs,
-            transform=scene.dataset.transform
+            transform=scene.transform
         )
         color_mapped = util.color_map(
             cropped_image,
@@ -104,6 +105,23 @@ def visualize_band_descrimination(scene, segmentation_mask, polygon, outdir):
     plt.title('Time series chart')
     plt.savefig(f"{outdir}/reflectance.png")
 
+def visualize_snr_time_series(stats, farm, bands, outdir):
+    """
+    Plot the object/surround SNR of a few bands over the whole collection,
+    read from the statistics table rather than the rasters.
+    """
+    fig, ax = plt.subplots()
+    for band in bands:
+        acquired, snr = stats.snr(farm, band)
+        ax.plot(acquired, snr, marker='o', label=band)
+    ax.legend()
+    fig.autofmt_xdate()
+
+    plt.xlabel('Acquired')
+    plt.ylabel('SNR (dB)')
+    plt.title(f'{farm} object/surround SNR')
+    plt.savefig(f"{outdir}/snr_time_series.png")
+
 project_dir = "/Users/cbabraham/Dropbox/code/seaweed"
 
 scott_lord = SceneCollection.load(
@@ -145,6 +163,13 @@ def run_projects(scene_collection):
         outdir
     )
 
+    # accumulate per scene statistics for all farms in one table
+    stats_path = f"{project_dir}/output/aoi_stats.npy"
+    stats = AOIStatistics.load(stats_path).append(AOIStatistics.from_collection(scene_collection))
+    stats.save(stats_path)
+
+    visualize_snr_time_series(stats, scene_collection.name, ["Near-Infrared", "ndvi"], outdir)
+
 run_projects(aquafort)
 
 
@@ -1,5 +1,5 @@
 from rasterio.io import DatasetReader
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 import os
 import json
 from datetime import datetime
@@ -8,7 +8,9 @@ import util
 from typing import Optional
 import numpy as np
 from rasterio.mask import mask
+from rasterio.features import geometry_mask, geometry_window
 from rasterio import MemoryFile
+from rasterio.transform import Affine
 from PIL import Image
 from abc import ABC, abstractmethod
 import geopandas as gpd
@@ -40,6 +42,43 @@ class SegmentationMask:
         img_array = np.array(img)[:,:,0]
         return cls(img_array)
 
+    def crop(self, polygon, crs, transform):
+        """ crop the mask to the bounding box of a lng/lat polygon,
+        pixels outside the polygon become ignore pixels.
+        crs and transform locate the frame the mask was drawn on.
+
+        Returns the cropped mask and its transform.
+        """
+        cropped, cropped_transform = util.mask_image(self.mask, polygon, crs, transform)
+        return type(self)(cropped), cropped_transform
+
+    def coverage(self, value, transform, frame_transform, shape):
+        """ transfer the region with the given mask value to another frame,
+        returning the fraction of each frame pixel covered by the region.
+
+        transform locates this mask and frame_transform locates the frame,
+        both are assumed to share a crs and pixel size so the transfer is a
+        (possibly sub-pixel) translation, applied as a bilinear blend of the
+        four surrounding whole pixel shifts.
+        """
+        region = (self.mask == value).astype(float)
+        height, width = region.shape
+
+        # frame pixel (y, x) shows mask pixel (y - dy, x - dx)
+        col, row = ~transform * (frame_transform.c, frame_transform.f)
+        dy, dx = -row, -col
+        iy, ix = int(np.floor(dy)), int(np.floor(dx))
+        fy, fx = dy - iy, dx - ix
+
+        out = np.zeros(shape)
+        for sy, wy in ((iy, 1 - fy), (iy + 1, fy)):
+            for sx, wx in ((ix, 1 - fx), (ix + 1, fx)):
+                y0, x0 = max(sy, 0), max(sx, 0)
+                y1, x1 = min(height + sy, shape[0]), min(width + sx, shape[1])
+                if y1 > y0 and x1 > x0:
+                    out[y0:y1, x0:x1] += wy * wx * region[y0 - sy:y1 - sy, x0 - sx:x1 - sx]
+        return out
+
 @dataclass
 class BaseScene(ABC):
     """
@@ -60,6 +99,10 @@ class BaseScene(ABC):
     # as needed.
     _bands: Optional[np.ndarray] = None
 
+    # optional override of the dataset's geo transform, used to align
+    # a scene without resampling its pixels.
+    _transform: Optional[Affine] = None
+
     @property
     @abstractmethod
     def rgb(self):
@@ -79,6 +122,12 @@ class BaseScene(ABC):
     def name(self):
         return self.metadata["id"]
 
+    @property
+    def transform(self):
+        if self._transform is None:
+            return self.dataset.transform
+        return self._transform
+
     @property
     def bands(self):
         if self._bands is None:
@@ -118,7 +167,13 @@ class BaseScene(ABC):
         polygon = polygon.to_crs(self.dataset.crs)
         
         out_image, out_transform = mask(self.dataset,  polygon.geometry.values, crop=crop)
-        
+        return self._from_array(out_image, out_transform)
+
+    def _from_array(self, out_image, out_transform):
+        """
+        Return a new instance of this scene holding out_image, located
+        at out_transform.
+        """
         # we have to jump through some hoops to reconstruct the rasterio dataset
         # in memory
         out_meta = self.dataset.meta
@@ -133,8 +188,40 @@ class BaseScene(ABC):
                 ds.write(out_image)
                 scene = type(self)(self.metadata, ds)
                 scene._bands = out_image
+                scene._transform = out_transform
                 return scene
 
+    def window_with_poly(self, polygon: gpd.GeoDataFrame):
+        """
+        Return the unmasked bands covering the bounding box of a polygon with
+        lng/lat coordinates, along with the geo transform of that window.
+
+        This is the same window mask_with_poly crops to, but pixels outside
+        the polygon keep their values. Only the window is read from disk.
+        """
+        polygon = polygon.to_crs(self.dataset.crs)
+        window = geometry_window(self.dataset, polygon.geometry.values)
+        return self.dataset.read(window=window), self.dataset.window_transform(window)
+
+    def crop_from_window(self, polygon: gpd.GeoDataFrame, bands, transform):
+        """
+        Given the output of window_with_poly, mask out the pixels outside the
+        polygon. Equivalent to mask_with_poly(polygon, crop=True) without
+        reading the window again.
+        """
+        polygon = polygon.to_crs(self.dataset.crs)
+        outside = geometry_mask(polygon.geometry.values, out_shape=bands.shape[1:], transform=transform)
+        nodata = self.dataset.nodata or 0
+        cropped = np.where(outside, nodata, bands).astype(bands.dtype)
+        return self._from_array(cropped, transform)
+
+    def with_transform(self, transform: Affine):
+        """
+        Return a copy of this scene that shares the same pixels
+        but is located with a different geo transform.
+        """
+        return replace(self, _transform=transform)
+
 
 class SuperDoveScene(BaseScene):
     """
@@ -208,6 +295,11 @@ class SceneCollection:
         self.reference_index = reference_index
         self.reference_mask = reference_mask
 
+        # per scene (dy, dx) pixel shifts of the AOI crop relative to
+        # the reference crop, populated by register()
+        self._shifts = {}
+        self._reference_crop_transform = None
+
         print("initialized scene collection")
         for scene in scenes:
             print(scene.metadata["id"])
@@ -216,6 +308,89 @@ class SceneCollection:
     def reference_scene(self):
         return self.scenes[self.reference_index]
 
+    def aoi_crops(self):
+        """ Crop every scene in the collection to the area outline
+        """
+        return [scene.mask_with_poly(self.area_outline, crop=True) for scene in self.scenes]
+
+    def aoi_windows(self):
+        """ Read the unmasked window covering the area outline from
+        every scene in the collection, see BaseScene.window_with_poly
+        """
+        return [scene.window_with_poly(self.area_outline) for scene in self.scenes]
+
+    def register(self, windows=None, max_shift=5):
+        """
+        Compute the sub-pixel shift of every scene's AOI relative to the
+        reference scene's AOI using FFT phase correlation on the NIR band,
+        where the seaweed/water contrast is highest.
+
+        The unmasked bounding box of the area outline is used rather than
+        the masked crop, the outline sits at the same pixels in every crop
+        and its edge would pull every shift towards zero. Nodata pixels
+        inside the window are filled with the window mean.
+
+        Planet scenes are misaligned by a few pixels, so the peak search is
+        limited to max_shift pixels. Shifts are not otherwise validated, a
+        cloudy scene can still produce a wrong shift within that bound, and
+        scenes whose shift lands on the bound are reported.
+
+        Shifts are cached per scene, so only the first call does any work.
+
+        Returns a map from scene_id to a (dy, dx) shift in pixels.
+        """
+        if all(scene.name in self._shifts for scene in self.scenes):
+            return self._shifts
+
+        if windows is None:
+            windows = self.aoi_windows()
+
+        # windows can differ by a pixel or so depending on how each scene's
+        # grid lines up with the outline, trim them to a common size
+        # anchored at the top left corner
+        height = min(bands.shape[1] for bands, _ in windows)
+        width = min(bands.shape[2] for bands, _ in windows)
+
+        stack = []
+        for scene, (bands, _) in zip(self.scenes, windows):
+            nir = bands[scene.band_names.index("Near-Infrared"), :height, :width].astype(float)
+            nodata = nir == (scene.dataset.nodata or 0)
+            if np.any(~nodata):
+                nir[nodata] = np.mean(nir[~nodata])
+            stack.append(nir)
+        stack = np.stack(stack)
+
+        shifts = util.phase_correlation_shifts(stack[self.reference_index], stack, max_shift=max_shift)
+
+        for scene, (dy, dx) in zip(self.scenes, shifts):
+            if max(abs(dy), abs(dx)) >= max_shift:
+                print(f"{scene.name} shift ({dy:.2f}, {dx:.2f}) is at the {max_shift} pixel limit, registration may have failed")
+            self._shifts[scene.name] = (float(dy), float(dx))
+        self._reference_crop_transform = windows[self.reference_index][1]
+
+        return self._shifts
+
+    def aligned_aoi_crops(self):
+        """
+        Crop every scene to the area outline and align it to the reference crop.
+
+        Alignment only updates each crop's geo transform, the pixels are
+        not resampled. This assumes all scenes share the reference scene's
+        crs and pixel size, which holds for Planet scenes of a single farm.
+        """
+        windows = self.aoi_windows()
+        shifts = self.register(windows)
+
+        aligned = []
+        for scene, (bands, window_transform) in zip(self.scenes, windows):
+            crop = scene.crop_from_window(self.area_outline, bands, window_transform)
+            dy, dx = shifts[scene.name]
+            # pixel (x, y) of this crop shows what the reference crop
+            # shows at (x - dx, y - dy)
+            transform = self._reference_crop_transform * Affine.translation(-dx, -dy)
+            aligned.append(crop.with_transform(transform))
+        return aligned
+
     def white_and_black_points(self):
         """ Compute global white and black points for the entire
         collection
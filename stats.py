@@ -0,0 +1,166 @@
+import os
+from dataclasses import dataclass
+import numpy as np
+from numpy.lib import recfunctions
+
+# one row per (farm, scene, band or index, region)
+STATS_DTYPE = np.dtype([
+    ("farm", "U32"),
+    ("scene", "U48"),
+    ("acquired", "datetime64[s]"),
+    ("band", "U16"),
+    ("region", "U8"),
+    ("mean", "f8"),
+    ("std", "f8"),
+    # pixel count, weighted by fractional mask coverage
+    ("count", "f8"),
+])
+
+REGIONS = ["object", "surround"]
+
+
+def check_lengths(rows):
+    """
+    Raise if any string in the rows is too long for its column, numpy
+    would otherwise silently truncate it and merge names sharing a prefix.
+    """
+    for field in STATS_DTYPE.names:
+        if STATS_DTYPE[field].kind != "U":
+            continue
+        max_length = STATS_DTYPE[field].itemsize // 4
+        column = STATS_DTYPE.names.index(field)
+        for row in rows:
+            if len(row[column]) > max_length:
+                raise ValueError(f"{field} {row[column]} is longer than {max_length} characters")
+
+
+@dataclass
+class AOIStatistics:
+    """
+    A columnar table of per scene statistics for the object and surround
+    regions of each farm, stored as a numpy structured array.
+
+    The table is populated in bulk from a SceneCollection and saved as a
+    single .npy file, so time series and cross farm queries can run without
+    reopening any GeoTIFF.
+    """
+    rows: np.ndarray
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=STATS_DTYPE))
+
+    @classmethod
+    def load(cls, path):
+        """ load a table previously written with save(), or an empty
+        table if the file does not exist yet
+        """
+        if not os.path.exists(path):
+            return cls.empty()
+        return cls(np.load(path))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.save(path, self.rows)
+
+    @classmethod
+    def from_collection(cls, scene_collection):
+        """
+        Compute object/surround statistics for every band and NDVI of every
+        scene in the collection.
+
+        The reference mask is cropped to the area outline and transferred to
+        each scene's aligned AOI crop through the crop transforms, so the
+        sub-pixel registration shifts are kept as fractional pixel weights.
+        Pixels outside the area outline are left out.
+        """
+        crops = scene_collection.aligned_aoi_crops()
+
+        reference = scene_collection.reference_scene
+        reference_mask, reference_transform = scene_collection.reference_mask.crop(
+            scene_collection.area_outline,
+            crs=reference.dataset.crs,
+            transform=reference.transform
+        )
+
+        rows = []
+        for crop in crops:
+            # mask_with_poly fills pixels outside the outline with 0 (nodata)
+            valid = np.all(crop.bands != 0, axis=0)
+            shape = crop.bands.shape[1:]
+            weights = [
+                reference_mask.coverage(255, reference_transform, crop.transform, shape) * valid,
+                reference_mask.coverage(134, reference_transform, crop.transform, shape) * valid,
+            ]
+
+            acquired = np.datetime64(crop.metadata["properties"]["acquired"].rstrip("Z")).astype("datetime64[s]")
+
+            image = np.concatenate((crop.bands, np.expand_dims(crop.ndvi(), axis=0)), axis=0)
+            band_names = crop.band_names + ["ndvi"]
+
+            for name, band in zip(band_names, image):
+                for region, weight in zip(REGIONS, weights):
+                    count = weight.sum()
+                    if count == 0:
+                        mean, std = np.nan, np.nan
+                    else:
+                        mean = np.average(band, weights=weight)
+                        std = np.sqrt(np.average((band - mean) ** 2, weights=weight))
+                    rows.append((scene_collection.name, crop.name, acquired, name, region, mean, std, count))
+
+        check_lengths(rows)
+        return cls(np.array(rows, dtype=STATS_DTYPE))
+
+    def append(self, other):
+        """
+        Return a new table with the rows of other appended. Rows of this table
+        for the same (farm, scene) pairs are replaced, so re-running a
+        collection doesn't duplicate it.
+        """
+        keys = recfunctions.repack_fields(self.rows[["farm", "scene"]])
+        other_keys = recfunctions.repack_fields(other.rows[["farm", "scene"]])
+        keep = ~np.isin(keys, other_keys)
+        return type(self)(np.concatenate((self.rows[keep], other.rows)))
+
+    def select(self, **filters):
+        """
+        Return the rows matching every filter, e.g.
+        select(farm="scott_lord", band=["Near-Infrared", "ndvi"])
+        """
+        keep = np.ones(len(self.rows), dtype=bool)
+        for column, values in filters.items():
+            keep &= np.isin(self.rows[column], values)
+        return type(self)(self.rows[keep])
+
+    def time_series(self, farm, band, region="object", column="mean"):
+        """
+        Return (acquired, values) arrays for one farm, band and region
+        sorted by acquisition date.
+        """
+        rows = self.select(farm=farm, band=band, region=region).rows
+        rows = rows[np.argsort(rows["acquired"])]
+        return rows["acquired"], rows[column]
+
+    def snr(self, farm, band):
+        """
+        Return (acquired, snr) arrays of the object to surround
+        signal to noise ratio in decibels, sorted by acquisition date.
+        """
+        rows = self.select(farm=farm, band=band).rows
+        object_rows = rows[rows["region"] == "object"]
+        surround_rows = rows[rows["region"] == "surround"]
+
+        # join the two regions on scene
+        _, object_idx, surround_idx = np.intersect1d(
+            object_rows["scene"], surround_rows["scene"], return_indices=True)
+        object_rows = object_rows[object_idx]
+        surround_rows = surround_rows[surround_idx]
+
+        # same definition as util.compute_snr, applied to the stored means
+        snr = 10 * np.log10(object_rows["mean"] / surround_rows["mean"])
+
+        order = np.argsort(object_rows["acquired"])
+        return object_rows["acquired"][order], snr[order]
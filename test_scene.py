@@ -0,0 +1,36 @@
+import numpy as np
+from rasterio.transform import Affine
+from scene import SegmentationMask
+
+
+def test_coverage_half_pixel_translation():
+    mask = np.zeros((5, 6), dtype=np.uint8)
+    mask[2, 2:4] = 255
+    mask[0, :] = 134
+    segmentation_mask = SegmentationMask(mask)
+
+    transform = Affine(3, 0, 1000, 0, -3, 2000)
+    # a frame whose pixel (y, x) shows mask pixel (y, x - 0.5)
+    frame_transform = transform * Affine.translation(-0.5, 0)
+
+    coverage = segmentation_mask.coverage(255, transform, frame_transform, mask.shape)
+
+    expected = np.zeros(mask.shape)
+    expected[2, 2:5] = [0.5, 1, 0.5]
+    np.testing.assert_allclose(coverage, expected)
+    assert coverage.sum() == 2
+
+
+def test_coverage_whole_pixel_translation():
+    mask = np.zeros((5, 6), dtype=np.uint8)
+    mask[1, 1] = 255
+    segmentation_mask = SegmentationMask(mask)
+
+    transform = Affine(3, 0, 1000, 0, -3, 2000)
+    # frame content is shifted by (dy, dx) = (2, 3)
+    frame_transform = transform * Affine.translation(-3, -2)
+
+    coverage = segmentation_mask.coverage(255, transform, frame_transform, mask.shape)
+
+    assert coverage[3, 4] == 1
+    assert coverage.sum() == 1
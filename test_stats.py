@@ -0,0 +1,65 @@
+import numpy as np
+from stats import AOIStatistics, STATS_DTYPE, check_lengths
+import pytest
+
+
+def rows(*values):
+    return np.array(list(values), dtype=STATS_DTYPE)
+
+
+def test_append_replaces_overlapping_scene():
+    day1 = np.datetime64("2022-05-01T00:00:00")
+    day2 = np.datetime64("2022-05-02T00:00:00")
+    table = AOIStatistics(rows(
+        ("scott_lord", "scene_a", day1, "ndvi", "object", 1.0, 0.0, 4.0),
+        ("scott_lord", "scene_b", day2, "ndvi", "object", 2.0, 0.0, 4.0),
+        ("aquafort", "scene_a", day1, "ndvi", "object", 3.0, 0.0, 4.0),
+    ))
+    rerun = AOIStatistics(rows(
+        ("scott_lord", "scene_b", day2, "ndvi", "object", 5.0, 0.0, 4.0),
+    ))
+
+    appended = AOIStatistics.empty().append(rerun)
+    assert len(appended) == 1
+
+    appended = table.append(rerun)
+    assert len(appended) == 3
+    replaced = appended.select(farm="scott_lord", scene="scene_b").rows
+    np.testing.assert_array_equal(replaced["mean"], [5.0])
+    # the same scene id on another farm is kept
+    np.testing.assert_array_equal(appended.select(farm="aquafort").rows["mean"], [3.0])
+
+
+def test_snr_joins_regions_per_scene_in_date_order():
+    day1 = np.datetime64("2022-05-01T00:00:00")
+    day2 = np.datetime64("2022-05-02T00:00:00")
+    table = AOIStatistics(rows(
+        ("scott_lord", "scene_b", day2, "ndvi", "surround", 10.0, 0.0, 4.0),
+        ("scott_lord", "scene_a", day1, "ndvi", "object", 10.0, 0.0, 4.0),
+        ("scott_lord", "scene_b", day2, "ndvi", "object", 100.0, 0.0, 4.0),
+        ("scott_lord", "scene_a", day1, "ndvi", "surround", 10.0, 0.0, 4.0),
+        ("scott_lord", "scene_a", day1, "Blue", "object", 50.0, 0.0, 4.0),
+    ))
+
+    acquired, snr = table.snr("scott_lord", "ndvi")
+
+    np.testing.assert_array_equal(acquired, [day1, day2])
+    np.testing.assert_allclose(snr, [0.0, 10.0])
+
+
+def test_save_load_round_trip(tmp_path):
+    table = AOIStatistics(rows(
+        ("scott_lord", "scene_a", np.datetime64("2022-05-01T00:00:00"), "ndvi", "object", 1.5, 0.5, 2.5),
+    ))
+    path = str(tmp_path / "stats" / "aoi_stats.npy")
+
+    assert len(AOIStatistics.load(path)) == 0
+    table.save(path)
+
+    np.testing.assert_array_equal(AOIStatistics.load(path).rows, table.rows)
+
+
+def test_check_lengths_rejects_long_names():
+    check_lengths([("scott_lord", "scene_a", None, "ndvi", "object", 1.0, 0.0, 1.0)])
+    with pytest.raises(ValueError):
+        check_lengths([("x" * 40, "scene_a", None, "ndvi", "object", 1.0, 0.0, 1.0)])
@@ -0,0 +1,62 @@
+import numpy as np
+import util
+
+
+def textured_image(height=64, width=80, seed=0):
+    """ smoothed noise, enough texture for phase correlation to lock on """
+    rng = np.random.default_rng(seed)
+    noise = rng.random((height, width))
+    falloff = np.exp(-30 * (np.fft.fftfreq(height)[:, None] ** 2 + np.fft.fftfreq(width)[None, :] ** 2))
+    return np.fft.ifft2(np.fft.fft2(noise) * falloff).real
+
+
+def fourier_shift(image, dy, dx):
+    """ shift an image by a possibly fractional amount, so that
+    shifted(y, x) = image(y - dy, x - dx)
+    """
+    ky = np.fft.fftfreq(image.shape[0])[:, None]
+    kx = np.fft.fftfreq(image.shape[1])[None, :]
+    return np.fft.ifft2(np.fft.fft2(image) * np.exp(-2j * np.pi * (ky * dy + kx * dx))).real
+
+
+def test_phase_correlation_integer_shifts():
+    reference = textured_image()
+    shifts = [(0, 0), (3, -2), (-4, 5), (1, 0), (0, -1)]
+    images = np.stack([np.roll(reference, shift, axis=(0, 1)) for shift in shifts])
+
+    recovered = util.phase_correlation_shifts(reference, images)
+
+    np.testing.assert_allclose(recovered, shifts, atol=0.05)
+
+
+def test_phase_correlation_fractional_shifts():
+    reference = textured_image()
+    shifts = [(2.3, -1.6), (-3.5, 0.4), (0.25, 4.75)]
+    images = np.stack([fourier_shift(reference, dy, dx) for dy, dx in shifts])
+
+    recovered = util.phase_correlation_shifts(reference, images)
+
+    np.testing.assert_allclose(recovered, shifts, atol=0.1)
+    np.testing.assert_array_equal(np.sign(recovered), np.sign(shifts))
+
+
+def test_phase_correlation_cropped_shift():
+    # shifted crops of a larger scene, so content leaves and enters at the edges
+    scene = textured_image(200, 200)
+    reference = scene[60:124, 70:150]
+    shifts = [(2, -3), (-1.5, 2.5)]
+    images = np.stack([fourier_shift(scene, dy, dx)[60:124, 70:150] for dy, dx in shifts])
+
+    recovered = util.phase_correlation_shifts(reference, images)
+
+    np.testing.assert_allclose(recovered, shifts, atol=0.1)
+
+
+def test_phase_correlation_max_shift():
+    reference = textured_image()
+    images = np.stack([np.roll(reference, (2, -1), axis=(0, 1)), np.roll(reference, (12, 0), axis=(0, 1))])
+
+    recovered = util.phase_correlation_shifts(reference, images, max_shift=5)
+
+    np.testing.assert_allclose(recovered[0], (2, -1), atol=0.05)
+    assert np.all(np.abs(recovered[1]) <= 6)
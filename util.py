@@ -222,3 +222,63 @@ def plot_images(images, labels, ncols, outfile):
 
     plt.tight_layout()
     plt.savefig(outfile)
+
+def phase_correlation_shifts(reference, images, upsample_factor=20, max_shift=None):
+    """
+    Estimate the sub-pixel translation of every image in a stack relative
+    to a reference image using FFT phase correlation. The FFTs of the whole
+    stack are computed in a single vectorized call.
+
+    Args:
+        reference: a (height, width) image
+        images: a (n, height, width) stack of images, the same size as reference
+        upsample_factor: shifts are resolved to 1/upsample_factor of a pixel
+        max_shift: if set, only peaks within max_shift pixels along each
+        axis are considered
+
+    Returns an (n, 2) array of (dy, dx) shifts such that
+    images[i](y, x) ~= reference(y - dy, x - dx)
+    """
+    n, height, width = images.shape
+
+    # remove the mean and taper the edges so the image borders don't
+    # dominate the correlation
+    window = np.outer(np.hanning(height), np.hanning(width))
+    reference = (reference - np.mean(reference)) * window
+    images = (images - np.mean(images, axis=(1, 2), keepdims=True)) * window
+
+    ref_fft = np.fft.fft2(reference)
+    stack_fft = np.fft.fft2(images, axes=(-2, -1))
+
+    # normalized cross power spectrum, keep only the phase
+    cross_power = stack_fft * np.conj(ref_fft)
+    cross_power /= np.maximum(np.abs(cross_power), np.finfo(float).eps)
+    correlation = np.fft.ifft2(cross_power, axes=(-2, -1)).real
+
+    if max_shift is not None:
+        shift_y = np.abs(np.fft.fftfreq(height) * height)
+        shift_x = np.abs(np.fft.fftfreq(width) * width)
+        out_of_range = (shift_y[:, None] > max_shift) | (shift_x[None, :] > max_shift)
+        correlation = np.where(out_of_range, -np.inf, correlation)
+
+    # integer peak location for every image, the correlation wraps around
+    # so peaks past the midpoint are negative shifts
+    peak_y, peak_x = np.unravel_index(correlation.reshape(n, -1).argmax(axis=1), (height, width))
+    peak_y = np.where(peak_y > height // 2, peak_y - height, peak_y)
+    peak_x = np.where(peak_x > width // 2, peak_x - width, peak_x)
+
+    # the window changes the shape of the peak, so rather than fitting a
+    # model to it, refine each peak by evaluating the correlation on a fine
+    # grid within one pixel of it with a matrix multiply DFT
+    # (Guizar-Sicairos et al. 2008)
+    offsets = np.arange(-upsample_factor, upsample_factor + 1) / upsample_factor
+    ys = peak_y[:, None] + offsets[None, :]
+    xs = peak_x[:, None] + offsets[None, :]
+    row_kernel = np.exp(2j * np.pi * ys[:, :, None] * np.fft.fftfreq(height)[None, None, :])
+    col_kernel = np.exp(2j * np.pi * xs[:, :, None] * np.fft.fftfreq(width)[None, None, :])
+    upsampled = np.einsum("nik,nkl,njl->nij", row_kernel, cross_power, col_kernel).real
+
+    idx = np.arange(n)
+    fine_y, fine_x = np.unravel_index(upsampled.reshape(n, -1).argmax(axis=1), upsampled.shape[1:])
+
+    return np.stack([ys[idx, fine_y], xs[idx, fine_x]], axis=1)